@@ -5,24 +5,26 @@
 
 import argparse
 import csv
+import functools
+import io
+import itertools
+import mmap
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
 
 
 PREAMBLE = r"""\documentclass[11pt, a4paper]{article}
 \usepackage{booktabs}
 \begin{document}"""
 
-HEADER = r"""\begin{{table}}[htb]
-{indent}\centering{caption}{label}
-{indent}\begin{{tabular}}{{@{{}}{align}@{{}}}}
-{indent}{indent}\toprule"""
-
-FOOTER = r"""{indent}{indent}\bottomrule
-{indent}\end{{tabular}}
-\end{{table}}"""
-
-LABEL = '\n{indent}\\label{{{label}}}'
-CAPTION = '\n{indent}\\caption{{{caption}}}'
+# files larger than this are memory-mapped instead of read onto the heap
+MMAP_THRESHOLD = 1 << 26
 
 
 class Tably:
@@ -31,7 +33,6 @@ class Tably:
     Methods:
         run: selects the appropriate methods to generate LaTeX code/files
         create_table: for each specified file, creates a LaTeX table
-        create_row: creates a row based on `line` content
         combine_tables: combines all tables from input files together
         save_single_table: creates and saves a single LaTeX table
         get_units: writes the units as a row of the LaTeX table
@@ -48,6 +49,8 @@ class Tably:
             align (string): wanted alignment of the columns
             no_indent (bool): should a LaTeX code be indented with 4 spaces per
                 code block. Doesn't affect the final looks of the table.
+            indent (string): one level of indentation, precomputed once
+            footer (string): the common end of every table, precomputed once
             outfile (string): name of the file where to save the results.
             separate_outfiles (list): names of the files where each table is saved
             skip (int): number of rows in .csv to skip
@@ -57,7 +60,8 @@ class Tably:
             fragment (bool): only output content in tabular environment
             fragment_skip_header (bool): shortcut of passing -k 1 -n -f
             replace (bool): replace existing output file if -o is passed
-            tex_str (function): escape LaTeX special characters or do nothing
+            tex_str (function): escapes LaTeX special characters,
+                or None if -e is passed
         """
         self.files = args.files
         self.no_header = args.no_header
@@ -65,6 +69,8 @@ class Tably:
         self.label = args.label
         self.align = args.align
         self.no_indent = args.no_indent
+        self.indent = 4*' ' if not args.no_indent else ''
+        self.footer = make_footer(self.indent)
         self.outfile = args.outfile
         self.separate_outfiles = args.separate_outfiles
         self.skip = args.skip
@@ -74,7 +80,7 @@ class Tably:
         self.fragment = args.fragment
         self.fragment_skip_header = args.fragment_skip_header
         self.replace = args.replace
-        self.tex_str = escape if not args.no_escape else lambda x: x
+        self.tex_str = escape if not args.no_escape else None
 
     def run(self):
         """The main method.
@@ -94,6 +100,7 @@ class Tably:
 
         if self.fragment:
             self.no_indent = True
+            self.indent = ''
             self.label = None
             self.preamble = False
 
@@ -108,19 +115,27 @@ class Tably:
                 except FileNotFoundError:
                     print('{} is not a valid/known path. Could not save there.'.format(self.outfile))
             else:
-                print(final_content)
+                for i, table in enumerate(final_content):
+                    if i:
+                        print()
+                    print('\n'.join(table))
 
         # if -oo is passed (could be [])
         if self.separate_outfiles is not None:
             outs = self.separate_outfiles
             if len(outs) == 0:
-                outs = [ os.path.splitext(file)[0]+'.tex' for file in self.files ]
+                outs = [ tex_filename(file) for file in self.files ]
             elif os.path.isdir(outs[0]):
-                outs = [ os.path.join(outs[0], os.path.splitext(os.path.basename(file))[0])+'.tex' for file in self.files ]
+                out_dir = outs[0]
+                outs = [ os.path.join(out_dir, tex_filename(os.path.basename(file))) for file in self.files ]
             elif len(outs) != len(self.files):
                 print('WARNING: Number of .csv files and number of output files do not match!')
-            for file, out in zip(self.files, outs):
-                self.save_single_table(file, out)
+            if len(self.files) > 1:
+                with ThreadPoolExecutor(max_workers=min(8, len(self.files))) as executor:
+                    list(executor.map(self.save_single_table, self.files, outs))
+            else:
+                for file, out in zip(self.files, outs):
+                    self.save_single_table(file, out)
 
     def create_table(self, file):
         """Creates a table from a given .csv file.
@@ -128,87 +143,160 @@ class Tably:
         This method gives the procedure of converting a .csv file to a LaTeX table.
         Unless -f is specified, the output is a ready-to-use LaTeX table environment.
         All other methods that need to obtain a LaTeX table from a .csv file call this method.
+        If pandas is available (and the separator is a single character),
+        it is used to parse the .csv file, since its C parser is much faster
+        than the stdlib csv module on large files.
         """
         rows = []
-        indent = 4*' ' if not self.no_indent else ''
+        ncols = 0
+        indent = self.indent
+        double_indent = indent + indent
 
         try:
-            with open(file) as infile:
-                for i, columns in enumerate(csv.reader(infile, delimiter=self.sep)):
-                    if i < self.skip:
-                        continue
-                    rows.append(self.create_row(columns, indent))
+            df = None
+            if pandas is not None and len(self.sep) == 1:
+                try:
+                    df = pandas.read_csv(file, sep=self.sep, header=None,
+                                         skiprows=self.skip, dtype=str,
+                                         engine='c', skip_blank_lines=False)
+                except (pandas.errors.EmptyDataError,
+                        pandas.errors.ParserError):
+                    # empty file, or rows wider than the first one:
+                    # the stdlib path below handles both
+                    df = None
+                if df is not None and df.isnull().values.any():
+                    # a missing value means pandas padded a short row or a
+                    # blank line (or NA-filtered a cell); the stdlib path
+                    # renders all of those exactly as they appear
+                    df = None
+            if df is not None:
+                ncols = df.shape[1]
+                if self.tex_str is escape:
+                    # escape whole columns at once instead of cell by cell
+                    for char in '#$%&_}{':
+                        df = df.apply(
+                            lambda col: col.str.replace(char, '\\'+char, regex=False))
+                for columns in df.itertuples(index=False, name=None):
+                    rows.append(double_indent + ' & '.join(columns) + r' \\')
+            else:
+                tex_str = self.tex_str
+                reader = None
+                if len(self.sep) == 1 and os.path.getsize(file) > MMAP_THRESHOLD:
+                    with open(file, 'rb') as infile:
+                        mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+                    if mapped.find(b'"') == -1 and mapped.find(b'\r') == -1:
+                        # too big to copy onto the heap: walk the lines
+                        # straight from the page cache
+                        lines = itertools.islice(iter_mmap_lines(mapped),
+                                                 self.skip, None)
+                        reader = (line.split(self.sep) for line in lines)
+                    else:
+                        # quotes or \r line endings: the buffered-read path
+                        # below parses those correctly
+                        mapped.close()
+                if reader is None:
+                    with open(file, buffering=1<<20, newline='') as infile:
+                        data = infile.read()
+                    if (len(self.sep) == 1 and '"' not in data
+                            and _EXOTIC_BREAKS.search(data) is None):
+                        if tex_str and self.sep not in '#$%&_}{\\':
+                            # one translate pass over the whole buffer replaces
+                            # the per-cell escape in the loop below
+                            # (skipped when the file is completely clean)
+                            if _SPECIAL.search(data) is not None:
+                                data = data.translate(_ESCAPE_TABLE)
+                            tex_str = None
+                        # no quoting anywhere, so a plain split per line
+                        # is enough -- much cheaper than csv's state machine
+                        reader = (line.split(self.sep)
+                                  for line in data.splitlines()[self.skip:])
+                    else:
+                        reader = itertools.islice(
+                            csv.reader(io.StringIO(data), delimiter=self.sep),
+                            self.skip, None)
+                first = next(reader, None)
+                if first is None:
+                    reader = ()
+                else:
+                    ncols = len(first)
+                    reader = itertools.chain((first,), reader)
+                join = ' & '.join
+                if tex_str:
+                    rows = [double_indent + join(tex_str(line)) + r' \\'
+                            for line in reader]
+                else:
+                    rows = [double_indent + join(line) + r' \\'
+                            for line in reader]
         except FileNotFoundError:
             print("File {} doesn't exist!!\n".format(file))
-            return ''
+            return []
         if not rows:
             print("No table created from the {} file. Check if the file is empty "
                   "or you used too high skip value.\n".format(file))
-            return ''
+            return []
 
         if not self.no_header:
-            rows.insert(1, r'{0}{0}\midrule'.format(indent))
+            head = [rows[0], double_indent + r'\midrule']
             if self.units:
-                rows[0] = rows[0] + r'\relax' # fixes problem with \[
-                units = self.get_units()
-                rows.insert(1, r'{0}{0}{1} \\'.format(indent, units))
+                head[0] += r'\relax' # fixes problem with \[
+                head.insert(1, double_indent + self.get_units() + r' \\')
+            rows[:1] = head
 
-        content = '\n'.join(rows)
         if not self.fragment:
-            header = HEADER.format(
-            label=add_label(self.label, indent),
-            caption=add_caption(self.caption, indent),
-            align=format_alignment(self.align, len(columns)),
-            indent=indent,
-            )
-            footer = FOOTER.format(indent=indent)
-            return '\n'.join((header, content, footer))
-        else:
-            return content
-
-    def create_row(self, line, indent):
-        """Creates a row based on `line` content"""
-        return r'{indent}{indent}{content} \\'.format(
-             indent=indent,
-             content=' & '.join(self.tex_str(line)))
+            header = make_header(indent,
+                                 add_label(self.label, indent),
+                                 add_caption(self.caption, indent),
+                                 format_alignment(self.align, ncols))
+            rows = [header] + rows
+            rows.append(self.footer)
+        return rows
 
     def combine_tables(self):
         """Combine all tables together and add a preamble if required.
 
         Unless -oo is specified, this is how input tables are arranged.
+        Returns a list of tables, each one a list of lines, so everything
+        can be streamed to the output without ever joining a table into
+        one huge string.
         """
         all_tables = []
         if self.label and len(self.files) > 1:
-            all_tables.append("% don't forget to manually re-label the tables")
+            all_tables.append(["% don't forget to manually re-label the tables"])
 
-        for file in self.files:
-            table = self.create_table(file)
+        if len(self.files) > 1:
+            # each file is independent, so read and convert them in parallel
+            with ThreadPoolExecutor(max_workers=min(8, len(self.files))) as executor:
+                tables = list(executor.map(self.create_table, self.files))
+        else:
+            tables = [self.create_table(file) for file in self.files]
+        for table in tables:
             if table:
                 all_tables.append(table)
         if not all_tables:
             return None
         if self.preamble:
-            all_tables.insert(0, PREAMBLE)
-            all_tables.append('\\end{document}\n')
-        return '\n\n'.join(all_tables)
+            all_tables.insert(0, [PREAMBLE])
+            all_tables.append(['\\end{document}\n'])
+        return all_tables
 
     def save_single_table(self, file, out):
         """Creates and saves a single LaTeX table"""
-        table = [self.create_table(file)]
+        table = self.create_table(file)
         if table:
+            content = [table]
             if self.preamble:
-                table.insert(0, PREAMBLE)
-                table.append('\\end{document}\n')
-            final_content = '\n\n'.join(table)
+                content.insert(0, [PREAMBLE])
+                content.append(['\\end{document}\n'])
             try:
-                save_content(final_content, out, self.replace)
+                save_content(content, out, self.replace)
             except FileNotFoundError:
                 print('{} is not a valid/known path. Could not save there.'.format(out))
 
     def get_units(self):
         """Writes the units as a row of the LaTeX table"""
         formatted_units = []
-        for unit in self.tex_str(self.units):
+        units = self.tex_str(self.units) if self.tex_str else self.units
+        for unit in units:
             if unit in '-/0':
                 formatted_units.append('')
             else:
@@ -216,24 +304,67 @@ class Tably:
         return ' & '.join(formatted_units)
 
 
+def iter_mmap_lines(mapped):
+    """Yields decoded lines of a memory-mapped file one by one,
+    so the whole file is never copied onto the heap.
+
+    Only splits on \\n; the caller makes sure files with \\r line
+    endings take the buffered-read path instead.
+    """
+    pos = 0
+    size = len(mapped)
+    while pos < size:
+        newline = mapped.find(b'\n', pos)
+        if newline == -1:
+            newline = size
+        yield mapped[pos:newline].decode('utf-8')
+        pos = newline + 1
+
+
+def tex_filename(file):
+    """Replaces the extension of `file` with .tex in a single
+    rpartition pass, avoiding the generic os.path.splitext machinery."""
+    stem, dot, ext = file.rpartition('.')
+    if not stem or not dot or os.sep in ext or stem.endswith(os.sep):
+        stem = file
+    return stem + '.tex'
+
+
+_SEP_MAP = {
+    't': '\t', 'tab': '\t', '\\t': '\t',
+    's': ';', 'semi': ';', ';': ';',
+    'c': ',', 'comma': ',', ',': ',',
+}
+
+
 def get_sep(sep):
-    if sep.lower() in ['t', 'tab', '\\t']:
-        return '\t'
-    elif sep.lower() in ['s', 'semi', ';']:
-        return ';'
-    elif sep.lower() in ['c', 'comma', ',']:
-        return ','
-    else:
-        return sep
+    return _SEP_MAP.get(sep.lower(), sep)
+
+
+_ESCAPE_TABLE = str.maketrans({char: '\\'+char for char in '#$%&_}{'})
+_SPECIAL = re.compile(r'[#$%&_}{]')
+# characters str.splitlines breaks on that are ordinary content to csv.reader
+_EXOTIC_BREAKS = re.compile('[\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+@functools.lru_cache(maxsize=1<<16)
+def _escape_cell(column):
+    """Escapes one cell; repeated values are looked up instead of rescanned"""
+    return column if _SPECIAL.search(column) is None \
+        else column.translate(_ESCAPE_TABLE)
 
 
 def escape(line):
-    """Escapes special LaTeX characters by prefixing them with backslash"""
-    for char in '#$%&_}{':
-        line = [column.replace(char, '\\'+char) for column in line]
-    return line
+    """Escapes special LaTeX characters by prefixing them with backslash.
+
+    Real CSVs repeat many cell values (categories, dates, IDs), so the
+    per-cell work is memoized: a duplicate cell costs one dict lookup
+    instead of a scan and a new string.
+    """
+    return list(map(_escape_cell, line))
 
 
+@functools.lru_cache(maxsize=None)
 def format_alignment(align, length):
     """Makes sure that provided alignment is valid:
     1. the length of alignment is either 1 or the same as the number of columns
@@ -244,7 +375,7 @@ def format_alignment(align, length):
     If alignment length is too short, it is padded with `c` for the missing
     columns.
     """
-    if any(ch not in 'lcr' for ch in align):
+    if align.strip('lcr'):
         align = 'c'
 
     if len(align) == 1:
@@ -252,38 +383,69 @@ def format_alignment(align, length):
     elif len(align) == length:
         return align
     else:
-        return '{:c<{l}.{l}}'.format(align, l=length)
+        return (align + 'c'*(length - len(align)))[:length]
+
+
+def make_header(indent, label, caption, align):
+    """Creates the opening of a table environment, up to the top rule"""
+    return (f'\\begin{{table}}[htb]\n'
+            f'{indent}\\centering{caption}{label}\n'
+            f'{indent}\\begin{{tabular}}{{@{{}}{align}@{{}}}}\n'
+            f'{indent}{indent}\\toprule')
+
+
+def make_footer(indent):
+    """Creates the closing of a table environment, from the bottom rule on"""
+    return (f'{indent}{indent}\\bottomrule\n'
+            f'{indent}\\end{{tabular}}\n'
+            '\\end{table}')
 
 
 def add_label(label, indent):
     """Creates a table label"""
-    return LABEL.format(label=label, indent=indent) if label else ''
+    return f'\n{indent}\\label{{{label}}}' if label else ''
 
 
 def add_caption(caption, indent):
     """Creates a table caption"""
-    return CAPTION.format(caption=caption, indent=indent) if caption else ''
+    return f'\n{indent}\\caption{{{caption}}}' if caption else ''
 
 
 def save_content(content, outfile, replace):
-    """Saves the content to a file.
+    """Saves the content (a list of tables, each a list of lines) to a file.
 
+    The lines are written to the file one by one, so the whole document
+    is never built in memory as a single string.
     If an existing file is provided, the content is appended to the end
     of the file by default. If -r is passed, the file is overwritten.
     """
+    with open(outfile, 'wb' if replace else 'ab', buffering=1<<20) as out:
+        for i, table in enumerate(content):
+            if i:
+                out.write(b'\n\n')
+            for j, line in enumerate(table):
+                if j:
+                    out.write(b'\n')
+                out.write(line.encode('utf-8'))
     if replace:
-        with open(outfile, 'w') as out:
-            out.writelines(content)
         print('The content is written to', outfile)
     else:
-        with open(outfile, 'a') as out:
-            out.writelines(content)
         print('The content is appended to', outfile)
 
 
 
+_PARSER = None
+
+
 def arg_parser():
     """Parses command line arguments and provides --help"""
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = _build_parser()
+    return _PARSER.parse_args()
+
+
+def _build_parser():
     parser = argparse.ArgumentParser(description="Creates LaTeX tables from .csv files")
 
     parser.add_argument(
@@ -389,7 +551,7 @@ def arg_parser():
         action='store_true',
         help='If selected and -o or -oo is passed, overwrite any existing output file.'
     )
-    return parser.parse_args()
+    return parser
 
 
 def main():